@@ -5,8 +5,10 @@ EMAIL_REGEX = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.edu+")
 
 
 def extract_email(html):
-    soup = BeautifulSoup(html, "lxml")
+    return extract_email_from_soup(BeautifulSoup(html, "lxml"))
 
+
+def extract_email_from_soup(soup):
     # 1️⃣ mailto links
     for a in soup.select("a[href^=mailto]"):
         email = a["href"].replace("mailto:", "").strip()
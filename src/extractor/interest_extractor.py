@@ -9,7 +9,10 @@ INTEREST_KEYWORDS = [
 
 
 def extract_interests(html):
-    soup = BeautifulSoup(html, "lxml")
+    return extract_interests_from_soup(BeautifulSoup(html, "lxml"))
+
+
+def extract_interests_from_soup(soup):
     interests = []
 
     for header in soup.find_all(["h2", "h3", "strong"]):
@@ -1,24 +1,40 @@
 from bs4 import BeautifulSoup
 
-from extractor.email_extractor import extract_email
+from extractor.email_extractor import extract_email_from_soup
 from extractor.rank_extractor import extract_rank
 from extractor.department_extractor import extract_department
-from extractor.interest_extractor import extract_interests
+from extractor.interest_extractor import extract_interests_from_soup
 
 
-def extract_profile(html, url):
+def extract_profile(html, url, template_cache=None):
     soup = BeautifulSoup(html, "lxml")
-    full_text = soup.get_text(" ", strip=True)
-
-    profile = {
-        "name": extract_name(soup),
-        "email": extract_email(html),
-        "rank": extract_rank(full_text),
-        "department": extract_department(full_text),
-        "interests": extract_interests(html),
-        "profile_url": url,
+    full_text = None
+
+    def page_text():
+        # Only built when rank/department are not served by a template
+        nonlocal full_text
+        if full_text is None:
+            full_text = soup.get_text(" ", strip=True)
+        return full_text
+
+    generic = {
+        "email": lambda: extract_email_from_soup(soup),
+        "rank": lambda: extract_rank(page_text()),
+        "department": lambda: extract_department(page_text()),
+        "interests": lambda: extract_interests_from_soup(soup),
     }
 
+    page = template_cache.page(url, soup) if template_cache is not None else None
+
+    profile = {"name": extract_name(soup)}
+    for field, extract in generic.items():
+        profile[field] = page.extract(field, extract) if page else extract()
+    profile["profile_url"] = url
+
+    if page is not None:
+        # Only learn from pages that pass the basic profile validation
+        page.finish(learn=bool(profile["name"] or profile["email"]))
+
     return profile
 
 
@@ -0,0 +1,381 @@
+import re
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from bs4 import Tag
+
+from extractor.email_extractor import EMAIL_REGEX
+from extractor.rank_extractor import extract_rank
+from extractor.department_extractor import extract_department
+from extractor.interest_extractor import INTEREST_KEYWORDS, split_interests
+from utils.logger import get_logger
+
+# Name is not templated: the generic soup.h1 lookup is already constant time
+FIELDS = ["email", "rank", "department", "interests"]
+
+# Ids/classes containing digits are usually per-profile (node-1234, user-42)
+# and would never agree across pages, so they are left out of paths. A
+# leading "-" must be followed by a letter, "_" or "-".
+SAFE_TOKEN = re.compile(r"^(?:[A-Za-z_]|-[A-Za-z_-])[A-Za-z_-]*$")
+
+
+# ---------------------------------------------------------------------------
+# Element paths: one (tag, id, classes, index) step per level from the document
+# root. Following a path only scans the children of each node on the way down,
+# instead of matching a selector against every element in the page.
+# ---------------------------------------------------------------------------
+
+
+def _step_for(el):
+    el_id = el.get("id")
+    el_id = el_id if el_id and SAFE_TOKEN.match(el_id) else None
+    classes = tuple(c for c in el.get("class", []) if SAFE_TOKEN.match(c))
+    return el.name, el_id, classes
+
+
+def _matches(child, name, el_id, classes):
+    return (
+        isinstance(child, Tag)
+        and child.name == name
+        and (el_id is None or child.get("id") == el_id)
+        and set(classes) <= set(child.get("class", []))
+    )
+
+
+def element_path(el):
+    """Build the child-step path from the document root down to `el`"""
+    steps = []
+
+    while el is not None and el.parent is not None:
+        name, el_id, classes = _step_for(el)
+        same_step = [c for c in el.parent.children if _matches(c, name, el_id, classes)]
+
+        # Position is only kept when tag/id/class alone is ambiguous, since
+        # sidebar/related-link counts vary between profiles. Tag.__eq__
+        # compares structure, so the element is found by identity.
+        index = None
+        if len(same_step) > 1:
+            index = next(i for i, sib in enumerate(same_step) if sib is el)
+
+        steps.append((name, el_id, classes, index))
+        el = el.parent
+
+    return tuple(reversed(steps)) if steps else None
+
+
+def follow_path(soup, path):
+    """Return the element `path` points at in `soup`, or None"""
+    node = soup
+    for name, el_id, classes, index in path:
+        wanted = index or 0
+        for child in node.children:
+            if _matches(child, name, el_id, classes):
+                if wanted == 0:
+                    node = child
+                    break
+                wanted -= 1
+        else:
+            return None
+    return node
+
+
+def format_path(path):
+    parts = []
+    for name, el_id, classes, index in path:
+        step = name + (f"#{el_id}" if el_id else "") + "".join(f".{c}" for c in classes)
+        parts.append(step + (f"[{index}]" if index is not None else ""))
+    return " > ".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Readers: turn the element a template points at into a field value
+# ---------------------------------------------------------------------------
+
+
+def _read_email(el):
+    href = el.get("href", "")
+    if href.startswith("mailto"):
+        return href.replace("mailto:", "").strip() or None
+    matches = EMAIL_REGEX.findall(el.get_text(" "))
+    return matches[0] if matches else None
+
+
+def _read_rank(el):
+    return extract_rank(el.get_text(" ", strip=True))
+
+
+def _read_department(el):
+    return extract_department(el.get_text(" ", strip=True))
+
+
+def _read_interests(el):
+    interests = split_interests(el.get_text(" ", strip=True))
+    return list(set(interests)) if interests else None
+
+
+READERS = {
+    "email": _read_email,
+    "rank": _read_rank,
+    "department": _read_department,
+    "interests": _read_interests,
+}
+
+
+# ---------------------------------------------------------------------------
+# Locators: find candidate elements that produced a generic value
+# ---------------------------------------------------------------------------
+
+
+def _locate_email(soup, value):
+    candidates = soup.select("a[href^=mailto]")
+    pattern = re.compile(re.escape(value))
+    candidates += [s.parent for s in soup.find_all(string=pattern)]
+    return candidates
+
+
+def _locate_text(soup, value):
+    pattern = re.compile(re.escape(value), re.IGNORECASE)
+    return [s.parent for s in soup.find_all(string=pattern)]
+
+
+def _locate_interests(soup, value):
+    sections = []
+    for header in soup.find_all(["h2", "h3", "strong"]):
+        header_text = header.get_text(strip=True).lower()
+        if any(key in header_text for key in INTEREST_KEYWORDS):
+            section = header.find_next_sibling()
+            if section:
+                sections.append(section)
+    return sections
+
+
+LOCATORS = {
+    "email": _locate_email,
+    "rank": _locate_text,
+    "department": _locate_text,
+    "interests": _locate_interests,
+}
+
+
+def _same_value(field, a, b):
+    if field == "interests":
+        return set(a or []) == set(b or [])
+    return a == b
+
+
+def _avg_ms(seconds, count):
+    return round(1000 * seconds / count, 2) if count else 0.0
+
+
+class DomainTemplate:
+    """Learned field paths and extraction stats for a single domain"""
+
+    def __init__(self, domain):
+        self.domain = domain
+        self.paths = {}  # field -> element path
+        self.candidates = {field: Counter() for field in FIELDS}
+        self.samples = Counter()  # field -> generic samples seen while learning
+        self.misses_in_row = Counter()
+        self.suspect = set()  # fields cross-checked on every page until they agree
+
+        self.pages = 0
+        self.template_pages = 0  # pages where at least one path was tried
+        self.learning_pages = 0
+        self.verified_pages = 0
+        self.fallbacks = 0
+        self.hits = Counter()
+        self.misses = Counter()
+
+        # Field extraction time, kept apart from learning and verification so
+        # the template and generic numbers are comparable
+        self.template_time = 0.0  # template pages, including fallbacks
+        self.generic_time = 0.0  # pages without a template
+        self.fallback_time = 0.0  # generic calls made after a template miss
+        self.learning_time = 0.0
+        self.verify_time = 0.0
+
+    def hit_rate(self):
+        tried = sum(self.hits.values()) + sum(self.misses.values())
+        return sum(self.hits.values()) / tried if tried else 0.0
+
+    def report(self):
+        return {
+            "domain": self.domain,
+            "pages": self.pages,
+            "template_pages": self.template_pages,
+            "learned_fields": sorted(self.paths),
+            "hit_rate": round(self.hit_rate(), 3),
+            "field_hits": dict(self.hits),
+            "field_misses": dict(self.misses),
+            "avg_ms_template_page": _avg_ms(self.template_time, self.template_pages),
+            "avg_ms_generic_page": _avg_ms(
+                self.generic_time, self.pages - self.template_pages
+            ),
+            "avg_ms_fallback": _avg_ms(self.fallback_time, self.fallbacks),
+            "avg_ms_learning_page": _avg_ms(self.learning_time, self.learning_pages),
+            "avg_ms_verify_page": _avg_ms(self.verify_time, self.verified_pages),
+        }
+
+
+class TemplatePage:
+    """Template lookups for a single profile page, see TemplateCache.page()"""
+
+    def __init__(self, cache, template, soup):
+        self.cache = cache
+        self.template = template
+        self.soup = soup
+        self.used_template = bool(template.paths)
+
+        # A wrong element still yields a value, so every Nth template page is
+        # cross-checked against the generic path
+        every = cache.verify_every
+        self.verify = (
+            self.used_template and template.template_pages % every == every - 1
+        )
+
+        self.verified = False
+        self.to_learn = {}
+        self.extract_time = 0.0
+
+    def extract(self, field, generic):
+        """Return `field` from the template, falling back to `generic()`"""
+        template = self.template
+        path = template.paths.get(field)
+        start = time.perf_counter()
+
+        if path is None:
+            value = generic()
+            self.extract_time += time.perf_counter() - start
+            if value is not None:
+                self.to_learn[field] = value
+            return value
+
+        el = follow_path(self.soup, path)
+        value = READERS[field](el) if el is not None else None
+
+        if value is None:
+            fallback_start = time.perf_counter()
+            value = generic()
+            template.fallback_time += time.perf_counter() - fallback_start
+            template.fallbacks += 1
+            self.extract_time += time.perf_counter() - start
+
+            # A path that finds nothing is only a miss when the generic path
+            # does; otherwise the field is simply absent on this page
+            if value is not None:
+                self.cache._record_miss(template, field)
+                self.to_learn[field] = value
+            return value
+
+        self.extract_time += time.perf_counter() - start
+
+        if self.verify or field in template.suspect:
+            self.verified = True
+            verify_start = time.perf_counter()
+            expected = generic()
+            template.verify_time += time.perf_counter() - verify_start
+            if not _same_value(field, value, expected):
+                # Unchecked pages in between must not reset the miss streak,
+                # so the field stays under cross-check until it agrees again
+                template.suspect.add(field)
+                self.cache._record_miss(template, field)
+                if expected is not None:
+                    self.to_learn[field] = expected
+                return expected
+            template.suspect.discard(field)
+
+        template.hits[field] += 1
+        template.misses_in_row[field] = 0
+        return value
+
+    def finish(self, learn=True):
+        """Record page stats and learn from the generic values seen on it"""
+        template = self.template
+        template.pages += 1
+        if self.used_template:
+            template.template_pages += 1
+            template.template_time += self.extract_time
+        else:
+            template.generic_time += self.extract_time
+        if self.verified:
+            template.verified_pages += 1
+
+        if learn and self.to_learn:
+            start = time.perf_counter()
+            for field, value in self.to_learn.items():
+                self.cache._learn(template, field, self.soup, value)
+            template.learning_time += time.perf_counter() - start
+            template.learning_pages += 1
+
+
+class TemplateCache:
+    """
+    Per-domain extraction templates.
+
+    Pages from the same university site share a CMS template, so after a few
+    successful generic extractions the element each field came from is
+    remembered as a path of child steps. Later pages from the domain read
+    those elements directly and fall back to the generic heuristics when the
+    path finds nothing, or when a sampled cross-check disagrees with the
+    generic value. A path is dropped after repeated misses.
+    """
+
+    def __init__(self, learn_pages=3, max_misses=3, verify_every=10):
+        self.learn_pages = learn_pages  # agreeing pages needed to adopt a path
+        self.max_misses = max_misses  # consecutive misses before a path is dropped
+        self.verify_every = verify_every  # cross-check every Nth template page
+        self.max_samples = learn_pages * 4  # give up learning a field after this
+        self.templates = {}
+        self.logger = get_logger("TemplateCache")
+
+    def get(self, domain):
+        if domain not in self.templates:
+            self.templates[domain] = DomainTemplate(domain)
+        return self.templates[domain]
+
+    def page(self, url, soup):
+        return TemplatePage(self, self.get(urlparse(url).netloc), soup)
+
+    def report(self, domain=None):
+        if domain is not None:
+            return self.get(domain).report()
+        return [t.report() for t in self.templates.values()]
+
+    def _record_miss(self, template, field):
+        template.misses[field] += 1
+        template.misses_in_row[field] += 1
+        if template.misses_in_row[field] >= self.max_misses:
+            self.logger.info(
+                f"Dropping {field} path for {template.domain}: "
+                f"{format_path(template.paths[field])}"
+            )
+            del template.paths[field]
+            template.suspect.discard(field)
+            template.candidates[field].clear()
+            template.samples[field] = 0
+            template.misses_in_row[field] = 0
+
+    def _learn(self, template, field, soup, value):
+        if field in template.paths or template.samples[field] >= self.max_samples:
+            return
+        template.samples[field] += 1
+
+        locate_value = value if isinstance(value, str) else None
+        for el in LOCATORS[field](soup, locate_value):
+            # Keep the first element whose template read reproduces the value
+            if not _same_value(field, READERS[field](el), value):
+                continue
+            path = element_path(el)
+            if path and follow_path(soup, path) is el:
+                template.candidates[field][path] += 1
+                break
+
+        if not template.candidates[field]:
+            return
+        path, count = template.candidates[field].most_common(1)[0]
+        if count >= self.learn_pages:
+            template.paths[field] = path
+            self.logger.info(
+                f"Learned {field} path for {template.domain}: {format_path(path)}"
+            )
@@ -5,6 +5,7 @@ from datetime import datetime
 from crawler.university_crawler import UniversityCrawler
 from scraper.fetcher import fetch
 from extractor.profile_extractor import extract_profile
+from extractor.template_cache import TemplateCache
 
 
 def main():
@@ -26,6 +27,13 @@ def main():
 
     all_profiles = []
 
+    # Per-domain extraction templates, shared across all universities
+    template_cache = TemplateCache(
+        learn_pages=crawler_config.get("template_learn_pages", 3),
+        max_misses=crawler_config.get("template_max_misses", 3),
+        verify_every=crawler_config.get("template_verify_every", 10),
+    )
+
     for uni in universities:
         print("\n" + "=" * 70)
         print(f"University: {uni['name']} ({uni['country']})")
@@ -64,7 +72,7 @@ def main():
             if not html:
                 continue
 
-            profile = extract_profile(html, url)
+            profile = extract_profile(html, url, template_cache)
 
             # Basic validation: must have at least name or email
             if not profile.get("name") and not profile.get("email"):
@@ -83,6 +91,8 @@ def main():
                 print(f"    Rank: {profile.get('rank', 'N/A')}")
                 print(f"    Department: {profile.get('department', 'N/A')}")
 
+        print_template_report(template_cache, crawler.domain)
+
         print(
             f"\nCompleted {uni['name']}: {len([p for p in all_profiles if p['university'] == uni['name']])} profiles extracted"
         )
@@ -108,6 +118,31 @@ def main():
         print("to test the configuration with AUC first.")
 
 
+def print_template_report(template_cache, base_domain):
+    """Print template hit rate and extraction time for a university's domains"""
+    base = base_domain.removeprefix("www.")
+    for report in template_cache.report():
+        domain = report["domain"]
+        if domain != base and not domain.endswith("." + base):
+            continue
+
+        print(f"\n Template stats for {report['domain']}:")
+        print(f"    Learned fields: {', '.join(report['learned_fields']) or 'none'}")
+        print(
+            f"    Hit rate: {report['hit_rate']:.1%} "
+            f"({report['template_pages']}/{report['pages']} pages used the template)"
+        )
+        print(
+            f"    Field extraction: {report['avg_ms_template_page']} ms/page "
+            f"with template, {report['avg_ms_generic_page']} ms/page without"
+        )
+        print(
+            f"    Generic fallback: {report['avg_ms_fallback']} ms/call | "
+            f"Learning: {report['avg_ms_learning_page']} ms/page | "
+            f"Cross-check: {report['avg_ms_verify_page']} ms/page"
+        )
+
+
 def export_to_excel(profiles):
     """Export profiles to Excel with proper formatting"""
 